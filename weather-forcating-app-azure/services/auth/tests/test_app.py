@@ -1,12 +1,13 @@
 import unittest
 from unittest.mock import patch
-import json
 import sys
 import os
 
 # Add the parent directory to sys.path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+from werkzeug.security import generate_password_hash
+
 from app import app, db, User
 
 class AuthServiceTests(unittest.TestCase):
@@ -26,7 +27,7 @@ class AuthServiceTests(unittest.TestCase):
     def test_health_endpoint(self):
         response = self.client.get('/health')
         self.assertEqual(response.status_code, 200)
-        data = json.loads(response.data)
+        data = response.get_json()
         self.assertEqual(data['status'], 'healthy')
     
     def test_register_user(self):
@@ -38,7 +39,7 @@ class AuthServiceTests(unittest.TestCase):
                                         'password': 'Password123!'
                                     })
         self.assertEqual(response.status_code, 201)
-        data = json.loads(response.data)
+        data = response.get_json()
         self.assertEqual(data['message'], 'User registered successfully')
         
         # Verify user was created in the database
@@ -62,8 +63,8 @@ class AuthServiceTests(unittest.TestCase):
                                         'email': 'test@example.com',
                                         'password': 'Password123!'
                                     })
-        self.assertEqual(response.status_code, 400)
-        data = json.loads(response.data)
+        self.assertEqual(response.status_code, 409)
+        data = response.get_json()
         self.assertIn('already exists', data['error'])
     
     def test_login_user(self):
@@ -81,9 +82,29 @@ class AuthServiceTests(unittest.TestCase):
                                         'password': 'Password123!'
                                     })
         self.assertEqual(response.status_code, 200)
-        data = json.loads(response.data)
+        data = response.get_json()
         self.assertIn('access_token', data)
     
+    def test_login_legacy_hash_upgraded(self):
+        # Create a user with a pre-Argon2 werkzeug hash
+        with app.app_context():
+            user = User(username='testuser', email='test@example.com')
+            user.password_hash = generate_password_hash('Password123!')
+            db.session.add(user)
+            db.session.commit()
+
+        # Login still works and the stored hash is upgraded to Argon2
+        response = self.client.post('/api/auth/login',
+                                    json={
+                                        'username': 'testuser',
+                                        'password': 'Password123!'
+                                    })
+        self.assertEqual(response.status_code, 200)
+        with app.app_context():
+            user = User.query.filter_by(username='testuser').first()
+            self.assertTrue(user.password_hash.startswith('$argon2'))
+            self.assertTrue(user.check_password('Password123!'))
+
     def test_login_invalid_credentials(self):
         # Create a user first
         with app.app_context():
@@ -99,7 +120,7 @@ class AuthServiceTests(unittest.TestCase):
                                         'password': 'WrongPassword123!'
                                     })
         self.assertEqual(response.status_code, 401)
-        data = json.loads(response.data)
+        data = response.get_json()
         self.assertIn('Invalid credentials', data['error'])
     
     def test_get_user_info(self):
@@ -116,13 +137,13 @@ class AuthServiceTests(unittest.TestCase):
                                             'username': 'testuser',
                                             'password': 'Password123!'
                                         })
-        token = json.loads(login_response.data)['access_token']
+        token = login_response.get_json()['access_token']
         
         # Test getting user info
         response = self.client.get('/api/auth/user', 
                                 headers={'Authorization': f'Bearer {token}'})
         self.assertEqual(response.status_code, 200)
-        data = json.loads(response.data)
+        data = response.get_json()
         self.assertEqual(data['username'], 'testuser')
         self.assertEqual(data['email'], 'test@example.com')
     
@@ -140,13 +161,13 @@ class AuthServiceTests(unittest.TestCase):
                                             'username': 'testuser',
                                             'password': 'Password123!'
                                         })
-        token = json.loads(login_response.data)['access_token']
+        token = login_response.get_json()['access_token']
         
         # Test token validation
         response = self.client.post('/api/auth/validate', 
                                     headers={'Authorization': f'Bearer {token}'})
         self.assertEqual(response.status_code, 200)
-        data = json.loads(response.data)
+        data = response.get_json()
         self.assertTrue(data['valid'])
         self.assertEqual(data['username'], 'testuser')
 
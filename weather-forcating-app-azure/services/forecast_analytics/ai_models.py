@@ -1,74 +1,177 @@
-import pandas as pd
+import re
+
 import numpy as np
+from numba import njit, prange
 from sklearn.linear_model import LinearRegression
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.preprocessing import StandardScaler
-from datetime import datetime, timedelta
 import joblib
 import os
+import time
+
+# Optional compiled-inference backend; sklearn prediction is used when absent
+try:
+    import treelite
+    import treelite_runtime
+except ImportError:
+    treelite = None
+    treelite_runtime = None
+
+def _time_features(timestamps):
+    """Extract day_of_year/month/day/hour arrays from datetime64 timestamps"""
+    days = timestamps.astype('datetime64[D]')
+    months = timestamps.astype('datetime64[M]')
+    years = timestamps.astype('datetime64[Y]')
+
+    day_of_year = (days - years).astype(np.int64) + 1
+    month = (months - years).astype(np.int64) + 1
+    day = (days - months).astype(np.int64) + 1
+    hour = timestamps.astype('datetime64[h]').astype(np.int64) % 24
+
+    return day_of_year, month, day, hour
+
+def _rolling_mean(values, window=5):
+    """Trailing mean over `window` samples (min_periods=1), via cumulative sums"""
+    csum = np.cumsum(np.insert(values, 0, 0.0))
+    idx = np.arange(1, values.size + 1)
+    counts = np.minimum(idx, window)
+    return (csum[idx] - csum[idx - counts]) / counts
+
+# The explicit signature compiles this eagerly at import time (cache=True
+# persists the machine code), specializing the fit for the shape the trend
+# endpoint always feeds it
+@njit('UniTuple(float64, 2)(float64[:])', cache=True)
+def fit_linear_trend(y):
+    """Closed-form least-squares slope/intercept of y over x = 0..n-1"""
+    n = y.size
+    x_mean = (n - 1) / 2.0
+    y_mean = y.mean()
+    num = 0.0
+    den = 0.0
+    for i in range(n):
+        dx = i - x_mean
+        num += dx * (y[i] - y_mean)
+        den += dx * dx
+    slope = num / den if den > 0.0 else 0.0
+    return slope, y_mean - slope * x_mean
 
 class WeatherTrendPredictor:
+    # Skip retraining while the training set is unchanged and younger than this
+    RETRAIN_INTERVAL = 3600  # seconds
+
     def __init__(self):
         self.model = None
         self.scaler = StandardScaler()
         self.model_path = 'models/weather_trend_model.pkl'
+        self.predictor_lib_path = 'models/weather_trend_model.so'
+        self._train_fingerprint = None
+        self._trained_at = 0.0
+        self._compiled_predictor = None
         self.load_or_create_model()
-    
+        self._load_compiled_predictor()
+
     def load_or_create_model(self):
         """Load existing model or create a new one if it doesn't exist"""
         if os.path.exists(self.model_path):
-            self.model = joblib.load(self.model_path)
+            saved = joblib.load(self.model_path)
+            if isinstance(saved, tuple):
+                self.model, self.scaler = saved
+            else:
+                # Model saved before the scaler was persisted alongside it
+                self.model = saved
         else:
             # Create a default model
             self.model = RandomForestRegressor(n_estimators=100, random_state=42)
             # Ensure the directory exists
             os.makedirs(os.path.dirname(self.model_path), exist_ok=True)
+
+    def _compile_predictor(self):
+        """Compile the fitted forest into a native shared library (best effort)"""
+        if treelite is None:
+            return
+        try:
+            tl_model = treelite.sklearn.import_model(self.model)
+            tl_model.export_lib(toolchain='gcc', libpath=self.predictor_lib_path,
+                                params={'parallel_comp': 4})
+            self._compiled_predictor = treelite_runtime.Predictor(
+                self.predictor_lib_path, nthread=2)
+        except Exception:
+            self._compiled_predictor = None
+
+    def _load_compiled_predictor(self):
+        """Pick up a previously compiled predictor library if one exists"""
+        if treelite_runtime is None or not os.path.exists(self.predictor_lib_path):
+            return
+        try:
+            self._compiled_predictor = treelite_runtime.Predictor(
+                self.predictor_lib_path, nthread=2)
+        except Exception:
+            self._compiled_predictor = None
+
+    def _predict_scaled(self, X_scaled):
+        """Run forest inference, preferring the compiled predictor"""
+        if self._compiled_predictor is not None:
+            batch = treelite_runtime.DMatrix(X_scaled.astype(np.float32))
+            return self._compiled_predictor.predict(batch)
+        return self.model.predict(X_scaled)
+
+    @staticmethod
+    def _fingerprint(historical_data):
+        return (len(historical_data), historical_data[-1]['timestamp'])
     
     def prepare_features(self, historical_data):
-        """Prepare features from historical weather data"""
-        df = pd.DataFrame(historical_data)
-        
-        # Convert timestamp to datetime
-        df['timestamp'] = pd.to_datetime(df['timestamp'])
-        
+        """Prepare a float32 feature matrix from historical weather data"""
+        timestamps = np.array([r['timestamp'] for r in historical_data], dtype='datetime64[s]')
+        temperature = np.array([r['temperature'] for r in historical_data], dtype=np.float64)
+        humidity = np.array([r['humidity'] for r in historical_data], dtype=np.float64)
+        pressure = np.array([r.get('pressure', 1013) for r in historical_data], dtype=np.float64)
+
         # Extract time-based features
-        df['day_of_year'] = df['timestamp'].dt.dayofyear
-        df['month'] = df['timestamp'].dt.month
-        df['day'] = df['timestamp'].dt.day
-        df['hour'] = df['timestamp'].dt.hour
-        
+        day_of_year, month, day, hour = _time_features(timestamps)
+
         # Calculate rolling averages if enough data
-        if len(df) > 5:
-            df['temp_rolling_avg'] = df['temperature'].rolling(window=5, min_periods=1).mean()
-            df['humidity_rolling_avg'] = df['humidity'].rolling(window=5, min_periods=1).mean()
-            df['pressure_rolling_avg'] = df.get('pressure', pd.Series([1013] * len(df))).rolling(window=5, min_periods=1).mean()
+        if len(historical_data) > 5:
+            temp_rolling_avg = _rolling_mean(temperature)
+            humidity_rolling_avg = _rolling_mean(humidity)
+            pressure_rolling_avg = _rolling_mean(pressure)
         else:
-            df['temp_rolling_avg'] = df['temperature']
-            df['humidity_rolling_avg'] = df['humidity']
-            df['pressure_rolling_avg'] = df.get('pressure', pd.Series([1013] * len(df)))
-        
-        # Select features for prediction
-        features = df[['day_of_year', 'month', 'day', 'hour', 
-                      'temp_rolling_avg', 'humidity_rolling_avg', 'pressure_rolling_avg']]
-        
-        return features, df['temperature']
+            temp_rolling_avg = temperature
+            humidity_rolling_avg = humidity
+            pressure_rolling_avg = pressure
+
+        # Stack features column-wise for prediction
+        features = np.column_stack((
+            day_of_year, month, day, hour,
+            temp_rolling_avg, humidity_rolling_avg, pressure_rolling_avg
+        )).astype(np.float32)
+
+        return features, temperature
     
     def train(self, historical_data):
         """Train the model with historical weather data"""
         if len(historical_data) < 10:
             return False  # Not enough data to train
-        
+
+        # Reuse the in-memory model when the training set hasn't changed
+        fingerprint = self._fingerprint(historical_data)
+        if (fingerprint == self._train_fingerprint
+                and time.time() - self._trained_at < self.RETRAIN_INTERVAL):
+            return True
+
         X, y = self.prepare_features(historical_data)
-        
+
         # Scale features
         X_scaled = self.scaler.fit_transform(X)
-        
+
         # Train the model
         self.model.fit(X_scaled, y)
-        
-        # Save the model
-        joblib.dump(self.model, self.model_path)
-        
+        self._train_fingerprint = fingerprint
+        self._trained_at = time.time()
+        self._compile_predictor()
+
+        # Save the model and fitted scaler together for warm restarts
+        joblib.dump((self.model, self.scaler), self.model_path)
+
         return True
     
     def predict(self, historical_data, days_to_predict=7):
@@ -78,47 +181,46 @@ class WeatherTrendPredictor:
         
         # Prepare historical features
         X, _ = self.prepare_features(historical_data)
-        
-        # Get the last timestamp
-        last_timestamp = pd.to_datetime(historical_data[-1]['timestamp'])
-        
+
         # Create future dates for prediction
-        future_dates = [last_timestamp + timedelta(days=i) for i in range(1, days_to_predict + 1)]
-        
-        # Create feature dataframe for future dates
-        future_df = pd.DataFrame({
-            'timestamp': future_dates,
-            'day_of_year': [date.dayofyear for date in future_dates],
-            'month': [date.month for date in future_dates],
-            'day': [date.day for date in future_dates],
-            'hour': [date.hour for date in future_dates]
-        })
-        
-        # Use the last values for rolling averages
-        future_df['temp_rolling_avg'] = X['temp_rolling_avg'].iloc[-1]
-        future_df['humidity_rolling_avg'] = X['humidity_rolling_avg'].iloc[-1]
-        future_df['pressure_rolling_avg'] = X['pressure_rolling_avg'].iloc[-1]
-        
-        # Select features for prediction
-        future_X = future_df[['day_of_year', 'month', 'day', 'hour', 
-                             'temp_rolling_avg', 'humidity_rolling_avg', 'pressure_rolling_avg']]
-        
+        last_timestamp = np.datetime64(historical_data[-1]['timestamp'], 's')
+        future_dates = last_timestamp + np.arange(1, days_to_predict + 1).astype('timedelta64[D]')
+
+        # Build the future feature matrix, carrying the last rolling averages forward
+        day_of_year, month, day, hour = _time_features(future_dates)
+        n = future_dates.size
+        future_X = np.column_stack((
+            day_of_year, month, day, hour,
+            np.full(n, X[-1, 4]), np.full(n, X[-1, 5]), np.full(n, X[-1, 6])
+        )).astype(np.float32)
+
         # Scale features
         future_X_scaled = self.scaler.transform(future_X)
-        
+
         # Make predictions
-        predictions = self.model.predict(future_X_scaled)
-        
+        predictions = self._predict_scaled(future_X_scaled)
+
         # Create result
         result = []
-        for i, date in enumerate(future_dates):
+        for date, temp in zip(np.datetime_as_string(future_dates, unit='D'), predictions):
             result.append({
-                'date': date.strftime('%Y-%m-%d'),
-                'predicted_temperature': float(predictions[i])
+                'date': str(date),
+                'predicted_temperature': float(temp)
             })
-        
+
         return result
 
+@njit(parallel=True, cache=True)
+def _threshold_flags(temps, winds, extreme_heat, freezing, high_wind):
+    """Branchless scan of temperature/wind arrays against alert thresholds"""
+    n = temps.size
+    flags = np.zeros((n, 3), dtype=np.uint8)
+    for i in prange(n):
+        flags[i, 0] = temps[i] >= extreme_heat
+        flags[i, 1] = temps[i] <= freezing
+        flags[i, 2] = winds[i] >= high_wind
+    return flags
+
 class SmartAlertSystem:
     def __init__(self):
         self.extreme_heat_threshold = 35.0  # °C
@@ -126,55 +228,66 @@ class SmartAlertSystem:
         self.high_wind_threshold = 20.0  # m/s
         self.heavy_rain_threshold = 10.0  # mm/h
         self.storm_keywords = ['thunderstorm', 'storm', 'hurricane', 'tornado']
+        # One compiled alternation so each description is scanned once
+        self._storm_re = re.compile('|'.join(self.storm_keywords), re.IGNORECASE)
     
     def analyze_forecast(self, forecast_data):
         """Analyze forecast data and generate smart alerts"""
         alerts = []
-        
-        for forecast in forecast_data:
+
+        # Run the numeric threshold checks as one compiled pass over
+        # structure-of-arrays data; alert dicts are only built for hits
+        count = len(forecast_data)
+        temps = np.fromiter((f.get('temperature', 0) for f in forecast_data),
+                            dtype=np.float64, count=count)
+        winds = np.fromiter((f.get('wind_speed', 0) for f in forecast_data),
+                            dtype=np.float64, count=count)
+        flags = _threshold_flags(temps, winds, self.extreme_heat_threshold,
+                                 self.freezing_threshold, self.high_wind_threshold)
+
+        for i, forecast in enumerate(forecast_data):
             date = forecast.get('timestamp', forecast.get('date', ''))
             temp = forecast.get('temperature', 0)
             wind = forecast.get('wind_speed', 0)
             description = forecast.get('description', '').lower()
-            
+
             # Check for extreme heat
-            if temp >= self.extreme_heat_threshold:
+            if flags[i, 0]:
                 alerts.append({
                     'type': 'extreme_heat',
                     'date': date,
                     'value': temp,
                     'message': f'Extreme heat warning: {temp}°C expected on {date}'
                 })
-            
+
             # Check for freezing conditions
-            if temp <= self.freezing_threshold:
+            if flags[i, 1]:
                 alerts.append({
                     'type': 'freezing',
                     'date': date,
                     'value': temp,
                     'message': f'Freezing conditions warning: {temp}°C expected on {date}'
                 })
-            
+
             # Check for high winds
-            if wind >= self.high_wind_threshold:
+            if flags[i, 2]:
                 alerts.append({
                     'type': 'high_winds',
                     'date': date,
                     'value': wind,
                     'message': f'High wind warning: {wind} m/s expected on {date}'
                 })
-            
+
             # Check for storms
-            for keyword in self.storm_keywords:
-                if keyword in description:
-                    alerts.append({
-                        'type': 'storm',
-                        'date': date,
-                        'value': description,
-                        'message': f'Storm warning: {description} expected on {date}'
-                    })
-                    break
-        
+            match = self._storm_re.search(description)
+            if match:
+                alerts.append({
+                    'type': 'storm',
+                    'date': date,
+                    'value': match.group(0),
+                    'message': f'Storm warning: {description} expected on {date}'
+                })
+
         return alerts
     
     def set_thresholds(self, extreme_heat=None, freezing=None, high_wind=None, heavy_rain=None):
@@ -1,7 +1,10 @@
 import os
 import json
 import requests
-from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor
+from flask import Flask, render_template, request, redirect, url_for, session, flash
+from flask_compress import Compress
 from prometheus_flask_exporter import PrometheusMetrics
 from dotenv import load_dotenv
 from functools import wraps
@@ -12,6 +15,11 @@ load_dotenv()
 app = Flask(__name__)
 metrics = PrometheusMetrics(app)
 
+# Compress JSON responses (dashboard XHRs); level 4 keeps CPU cost modest
+app.config['COMPRESS_MIMETYPES'] = ['application/json']
+app.config['COMPRESS_LEVEL'] = 4
+Compress(app)
+
 # Configure session
 app.secret_key = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production')
 
@@ -20,6 +28,17 @@ WEATHER_SERVICE_URL = os.getenv('WEATHER_SERVICE_URL', 'http://weather-data-serv
 FORECAST_SERVICE_URL = os.getenv('FORECAST_SERVICE_URL', 'http://forecast-analytics-service:5002')
 AUTH_SERVICE_URL = os.getenv('AUTH_SERVICE_URL', 'http://auth-service:5003')
 
+# Shared HTTP session (pooled keep-alive connections) and a fan-out pool
+# created once so thread startup stays off the request path
+http_session = requests.Session()
+_adapter = requests.adapters.HTTPAdapter(
+    pool_connections=32, pool_maxsize=64,
+    max_retries=Retry(total=2, backoff_factor=0.1)
+)
+http_session.mount('http://', _adapter)
+http_session.mount('https://', _adapter)
+executor = ThreadPoolExecutor(max_workers=5)
+
 # Login required decorator
 def login_required(f):
     @wraps(f)
@@ -30,9 +49,14 @@ def login_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
+# Probes hit /health every few seconds; serialize the constant payload once
+# and keep it out of the per-request metrics labels
+_HEALTH_BODY = json.dumps({'status': 'healthy', 'service': 'frontend-service'}).encode()
+
 @app.route('/health', methods=['GET'])
+@metrics.do_not_track()
 def health_check():
-    return jsonify({'status': 'healthy', 'service': 'frontend-service'})
+    return app.response_class(_HEALTH_BODY, mimetype='application/json')
 
 @app.route('/')
 def index():
@@ -43,37 +67,30 @@ def index():
 def dashboard():
     city = request.args.get('city', 'London')
     
+    # The five upstream calls are independent, so issue them all at once;
+    # page latency becomes the slowest call instead of the sum of all five
+    urls = {
+        'weather': f"{WEATHER_SERVICE_URL}/api/weather/current?city={city}",
+        'forecast': f"{WEATHER_SERVICE_URL}/api/weather/forecast?city={city}",
+        'analytics': f"{FORECAST_SERVICE_URL}/api/analytics/weather-summary?city={city}",
+        'trend': f"{FORECAST_SERVICE_URL}/api/analytics/temperature-trend?city={city}",
+        'alerts': f"{FORECAST_SERVICE_URL}/api/analytics/severe-weather-alert?city={city}",
+    }
+
     try:
-        # Get current weather
-        weather_response = requests.get(f"{WEATHER_SERVICE_URL}/api/weather/current?city={city}")
-        weather_data = weather_response.json()
-        
-        # Get forecast
-        forecast_response = requests.get(f"{WEATHER_SERVICE_URL}/api/weather/forecast?city={city}")
-        forecast_data = forecast_response.json()
-        
-        # Get weather analytics
-        analytics_response = requests.get(f"{FORECAST_SERVICE_URL}/api/analytics/weather-summary?city={city}")
-        analytics_data = analytics_response.json()
-        
-        # Get temperature trend
-        trend_response = requests.get(f"{FORECAST_SERVICE_URL}/api/analytics/temperature-trend?city={city}")
-        trend_data = trend_response.json()
-        
-        # Get severe weather alerts
-        alerts_response = requests.get(f"{FORECAST_SERVICE_URL}/api/analytics/severe-weather-alert?city={city}")
-        alerts_data = alerts_response.json()
-        
+        futures = {key: executor.submit(http_session.get, url) for key, url in urls.items()}
+        results = {key: future.result().json() for key, future in futures.items()}
+
         return render_template(
             'dashboard.html',
             city=city,
-            weather=weather_data,
-            forecast=forecast_data,
-            analytics=analytics_data,
-            trend=trend_data,
-            alerts=alerts_data
+            weather=results['weather'],
+            forecast=results['forecast'],
+            analytics=results['analytics'],
+            trend=results['trend'],
+            alerts=results['alerts']
         )
-    
+
     except requests.exceptions.RequestException as e:
         flash(f"Error fetching weather data: {str(e)}", 'danger')
         return render_template('dashboard.html', error=str(e))
@@ -85,7 +102,7 @@ def login():
         password = request.form.get('password')
         
         try:
-            response = requests.post(
+            response = http_session.post(
                 f"{AUTH_SERVICE_URL}/api/auth/login",
                 json={'username': username, 'password': password}
             )
@@ -117,7 +134,7 @@ def register():
             return render_template('register.html')
         
         try:
-            response = requests.post(
+            response = http_session.post(
                 f"{AUTH_SERVICE_URL}/api/auth/register",
                 json={
                     'username': username,
@@ -0,0 +1,9 @@
+# The service is I/O-bound (OpenWeatherMap calls + SQLite); gevent workers
+# let concurrent requests overlap their upstream waits instead of queueing
+# behind sync workers
+import multiprocessing
+
+bind = '0.0.0.0:5001'
+worker_class = 'gevent'
+workers = 2 * multiprocessing.cpu_count() + 1
+worker_connections = 1000
@@ -0,0 +1,25 @@
+import requests
+from urllib3.util.retry import Retry
+
+# Shared HTTP session so OpenWeatherMap calls reuse pooled TLS connections
+# instead of paying a fresh TCP+TLS handshake per request
+session = requests.Session()
+_adapter = requests.adapters.HTTPAdapter(
+    pool_connections=32, pool_maxsize=64,
+    max_retries=Retry(total=2, backoff_factor=0.1)
+)
+session.mount('http://', _adapter)
+session.mount('https://', _adapter)
+
+def get_json(url, timeout=(2, 5), **kwargs):
+    """GET `url` on the pooled session and return the decoded JSON body.
+
+    A default (connect, read) timeout bounds every call — the in-flight
+    coalescer holds a per-city slot during the fetch, so a hung leader
+    would otherwise stall followers and then stampede upstream anyway.
+    Raises requests.exceptions.RequestException on transport errors and
+    non-2xx responses; callers (and tests) only ever see plain dicts.
+    """
+    response = session.get(url, timeout=timeout, **kwargs)
+    response.raise_for_status()
+    return response.json()